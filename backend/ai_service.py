@@ -2,9 +2,93 @@
 AI Analysis Service with Multi-Agent System using REAL Azure OpenAI
 """
 from openai import AzureOpenAI
+from concurrent.futures import ThreadPoolExecutor
 import json
 import base64
+import io
+import logging
+import threading
+import time
+from typing import Optional
 from config import settings
+from token_budget import count_tokens, count_message_tokens, truncate_to_tokens
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - images are sent as uploaded
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+PHOTO_SYSTEM_PROMPT = "You are an expert industrial equipment inspector with years of experience."
+
+STRUCTURED_OUTPUT_EXAMPLE_INPUT = """checked padmount transformer T-892 behind shopping center. all good. no issues. paint is fine, no rust, locks working properly. ground around it is stable. last serviced 6 months ago. cooling fins clean. no unusual sounds or smells. temperature normal. maybe inspect again in a year. everything looks great."""
+
+STRUCTURED_OUTPUT_EXAMPLE_OUTPUT = """{
+  "executive_summary": "Padmount Transformer T-892 is in excellent condition with no issues identified. All components functioning properly, recent service maintenance completed, and no safety concerns present.",
+  "condition_assessment": {
+    "overall_status": "Good",
+    "urgency_level": "Low",
+    "safety_risk": "None"
+  },
+  "findings": [
+    "Exterior paint in good condition",
+    "No corrosion or rust detected",
+    "Security locks functioning properly",
+    "Ground stability confirmed",
+    "Cooling fins clean and unobstructed",
+    "No abnormal sounds detected",
+    "Operating temperature within normal range"
+  ],
+  "issues_identified": [],
+  "recommendations": [
+    "Continue routine inspection schedule",
+    "Next inspection in 12 months"
+  ],
+  "next_actions": {
+    "create_workorder": false,
+    "priority": "Routine",
+    "maintenance_required": false
+  },
+  "safety_notes": "No safety concerns identified. Asset operating safely."
+}"""
+
+# Static few-shot prefix, kept compact: identical on every call so the service can
+# reuse it from its prompt cache when the prompt is large enough to qualify
+STRUCTURED_OUTPUT_PREFIX = [
+    {
+        "role": "system",
+        "content": "Convert inspection notes to JSON with the same structure as the example. Return only valid JSON. No markdown."
+    },
+    {"role": "user", "content": f"Status: Good\nUrgency: Low\nNotes: {STRUCTURED_OUTPUT_EXAMPLE_INPUT}"},
+    {"role": "assistant", "content": STRUCTURED_OUTPUT_EXAMPLE_OUTPUT},
+]
+
+class PhotoNotesCache:
+    """
+    Vision notes recorded when a photo is uploaded, keyed by stored photo name,
+    so submitting the audit does not send the images to the model again
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._notes = {}
+        self._lock = threading.Lock()
+
+    def put(self, name: str, notes: str):
+        now = time.monotonic()
+        with self._lock:
+            self._notes[name] = (now + self.ttl_seconds, notes)
+            for expired in [key for key, (expires, _) in self._notes.items() if expires < now]:
+                del self._notes[expired]
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            entry = self._notes.get(name)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
 
 class AIService:
     def __init__(self):
@@ -14,16 +98,14 @@ class AIService:
             azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
         )
         self.deployment = settings.AZURE_OPENAI_DEPLOYMENT
+        self.photo_notes = PhotoNotesCache(settings.AI_PHOTO_NOTES_TTL_SECONDS)
     
-    def analyze_photo(self, image_content: bytes, audit_status: str) -> str:
+    def analyze_photo(self, image_content: bytes, audit_status: str, usage: list = None) -> str:
         """
         REAL Azure OpenAI Vision analysis of inspection photo
         Uses GPT-4 Vision to analyze the actual image content
         """
         try:
-            # Convert image bytes to base64
-            base64_image = base64.b64encode(image_content).decode('utf-8')
-            
             prompt = f"""You are an expert industrial asset inspector analyzing an inspection photo.
 
 The asset has been marked as: {audit_status}
@@ -36,26 +118,19 @@ Analyze this image and provide a brief technical assessment (2-3 sentences) focu
 
 Be specific about what you observe in the image. Keep it professional and concise."""
 
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert industrial equipment inspector with years of experience."
-                    },
+            response = self._chat(
+                "photo",
+                [
+                    {"role": "system", "content": PHOTO_SYSTEM_PROMPT},
                     {
                         "role": "user",
                         "content": [
                             {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                }
-                            }
+                            self._image_part(image_content)
                         ]
                     }
                 ],
+                usage,
                 temperature=0.3,
                 max_tokens=200
             )
@@ -65,21 +140,214 @@ Be specific about what you observe in the image. Keep it professional and concis
         except Exception as e:
             return f"Image analysis error: {str(e)}. Photo captured for manual review."
     
+    def analyze_photos(self, images: list, audit_status: str, usage: list = None) -> dict:
+        """
+        Analyze all of an audit's photos together in one multimodal request
+        Returns per-image notes (in input order) and a combined assessment.
+        Large sets, or a failed batch call, fall back to concurrent per-image analysis.
+        """
+        if not images:
+            return {"photo_notes": [], "combined_assessment": ""}
+        
+        if len(images) <= settings.AI_VISION_BATCH_MAX_IMAGES:
+            try:
+                return self._analyze_photo_batch(images, audit_status, usage)
+            except Exception as e:
+                logger.warning("Batched photo analysis failed, falling back to per-image: %s", e)
+        
+        with ThreadPoolExecutor(max_workers=settings.AI_VISION_MAX_CONCURRENCY) as executor:
+            notes = list(executor.map(lambda image: self.analyze_photo(image, audit_status, usage), images))
+        
+        return {"photo_notes": notes, "combined_assessment": self.combine_photo_notes(notes, audit_status, usage)}
+    
+    def _analyze_photo_batch(self, images: list, audit_status: str, usage: list = None) -> dict:
+        """Single vision request covering every photo"""
+        prompt = f"""You are an expert industrial asset inspector reviewing {len(images)} inspection photos of the same asset, numbered in order.
+
+The asset has been marked as: {audit_status}
+
+For each photo give a brief technical assessment (2-3 sentences) of the visible condition, defects, wear, corrosion or damage, safety concerns and maintenance recommendations.
+Then give a combined assessment (2-4 sentences) of the asset across all photos.
+
+Return ONLY valid JSON, no markdown:
+{{"photos": [{{"photo": 1, "notes": "..."}}], "combined_assessment": "..."}}"""
+
+        content = [{"type": "text", "text": prompt}]
+        for number, image in enumerate(images, start=1):
+            content.append({"type": "text", "text": f"Photo {number}:"})
+            content.append(self._image_part(image))
+        
+        response = self._chat(
+            "photo_batch",
+            [
+                {"role": "system", "content": PHOTO_SYSTEM_PROMPT},
+                {"role": "user", "content": content}
+            ],
+            usage,
+            temperature=0.3,
+            max_tokens=150 * len(images) + 250
+        )
+        
+        result = self._parse_json_content(response.choices[0].message.content)
+        notes_by_photo = {int(item["photo"]): item["notes"].strip() for item in result["photos"]}
+        return {
+            "photo_notes": [
+                notes_by_photo.get(number, "No notes returned. Photo captured for manual review.")
+                for number in range(1, len(images) + 1)
+            ],
+            "combined_assessment": result.get("combined_assessment", "").strip()
+        }
+    
+    def combine_photo_notes(self, notes: list, audit_status: str, usage: list = None) -> str:
+        """Text-only combined assessment from per-image notes"""
+        listed = "\n".join(f"Photo {number}: {note}" for number, note in enumerate(notes, start=1))
+        prompt = f"""Combine these per-photo inspection notes into a 2-4 sentence overall assessment of the asset.
+
+Status: {audit_status}
+{truncate_to_tokens(listed, settings.AI_COMMENT_TOKEN_BUDGETS["summary"])}"""
+
+        try:
+            response = self._chat(
+                "photo_combine",
+                [
+                    {"role": "system", "content": PHOTO_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                usage,
+                temperature=0.3,
+                max_tokens=250
+            )
+            return response.choices[0].message.content.strip()
+        except:
+            return f"{len(notes)} photos reviewed individually with {audit_status} status."
+    
+    def _image_part(self, image_content: bytes) -> dict:
+        """Chat content part for an image, downscaled to AI_VISION_MAX_EDGE"""
+        if Image is not None:
+            try:
+                image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_content)))
+                image.thumbnail((settings.AI_VISION_MAX_EDGE, settings.AI_VISION_MAX_EDGE))
+                output = io.BytesIO()
+                image.convert("RGB").save(output, format="JPEG", quality=80)
+                image_content = output.getvalue()
+            except Exception:
+                pass
+        
+        base64_image = base64.b64encode(image_content).decode('utf-8')
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{base64_image}",
+                "detail": settings.AI_VISION_DETAIL
+            }
+        }
+    
+    def _parse_json_content(self, content: str) -> dict:
+        """Parse model output as JSON, stripping a markdown code fence if present"""
+        content = content.strip()
+        if content.startswith("```"):
+            content = content.split("```")[1]
+            if content.startswith("json"):
+                content = content[4:]
+            content = content.strip()
+        return json.loads(content)
+    
     def analyze_audit(self, raw_comments: str, audit_status: str, photo_count: int) -> dict:
         """
         Multi-Agent AI Analysis Pipeline using REAL Azure OpenAI
+        Comments are fitted to each agent's token budget; per-call usage is returned
         """
-        urgency_level = self._determine_urgency(raw_comments, audit_status)
-        summary = self._create_summary(raw_comments, audit_status, photo_count)
-        structured_output = self._generate_structured_output(raw_comments, audit_status, urgency_level)
+        usage = []
+        comments = self._compact_comments(raw_comments, usage)
+        budgets = settings.AI_COMMENT_TOKEN_BUDGETS
+        
+        # Urgency sees the whole (compacted if oversized) comments: safety keywords
+        # anywhere in the notes can raise it, so it is never truncated further
+        urgency_level = self._determine_urgency(comments, audit_status, usage)
+        summary = self._create_summary(
+            truncate_to_tokens(comments, budgets["summary"]), audit_status, photo_count, usage
+        )
+        structured_output = self._generate_structured_output(
+            truncate_to_tokens(comments, budgets["structured_output"]), audit_status, urgency_level, usage
+        )
         
         return {
             "urgency_level": urgency_level,
             "summary": summary,
-            "structured_output": structured_output
+            "structured_output": structured_output,
+            "usage": self.summarize_usage(usage)
         }
     
-    def _determine_urgency(self, comments: str, status: str) -> str:
+    def _chat(self, agent: str, messages: list, usage: list = None, **kwargs):
+        """Run a chat completion and record prompt/completion tokens and latency"""
+        estimated_tokens = count_message_tokens(messages)
+        start = time.perf_counter()
+        response = self.client.chat.completions.create(
+            model=self.deployment,
+            messages=messages,
+            **kwargs
+        )
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        # openai 1.3.x leaves prompt_tokens_details as a plain dict; later releases return an object
+        details = getattr(response.usage, "prompt_tokens_details", None)
+        if isinstance(details, dict):
+            cached_tokens = details.get("cached_tokens")
+        else:
+            cached_tokens = getattr(details, "cached_tokens", None)
+        record = {
+            "agent": agent,
+            "estimated_prompt_tokens": estimated_tokens,
+            "prompt_tokens": response.usage.prompt_tokens if response.usage else None,
+            "completion_tokens": response.usage.completion_tokens if response.usage else None,
+            "cached_tokens": cached_tokens,
+            "latency_ms": round(latency_ms, 1)
+        }
+        if usage is not None:
+            usage.append(record)
+        logger.info("AI call %s", record)
+        return response
+    
+    def summarize_usage(self, usage: list) -> dict:
+        """Totals across an audit's AI calls"""
+        return {
+            "prompt_tokens": sum(call["prompt_tokens"] or 0 for call in usage),
+            "completion_tokens": sum(call["completion_tokens"] or 0 for call in usage),
+            "cached_tokens": sum(call["cached_tokens"] or 0 for call in usage),
+            "latency_ms": round(sum(call["latency_ms"] for call in usage), 1),
+            "calls": usage
+        }
+    
+    def _compact_comments(self, comments: str, usage: list) -> str:
+        """
+        Condense oversized comments once per audit so every agent reuses the result
+        Falls back to truncation if the condensing call fails
+        """
+        if count_tokens(comments) <= settings.AI_PRESUMMARIZE_THRESHOLD:
+            return comments
+        
+        budget = max(settings.AI_COMMENT_TOKEN_BUDGETS.values())
+        prompt = f"""Condense these inspection notes to at most {budget} tokens.
+Keep every defect, measurement, location, safety concern and recommendation. Drop filler and repetition.
+
+Notes: {truncate_to_tokens(comments, settings.AI_PRESUMMARIZE_THRESHOLD * 4)}"""
+        
+        try:
+            response = self._chat(
+                "compaction",
+                [
+                    {"role": "system", "content": "You condense field inspection notes without losing findings."},
+                    {"role": "user", "content": prompt}
+                ],
+                usage,
+                temperature=0.2,
+                max_tokens=budget
+            )
+            return response.choices[0].message.content.strip()
+        except:
+            return truncate_to_tokens(comments, budget)
+    
+    def _determine_urgency(self, comments: str, status: str, usage: list = None) -> str:
         """Agent 1: Determine urgency using REAL Azure OpenAI"""
         prompt = f"""You are an expert industrial asset inspector. Analyze this audit and determine urgency.
 
@@ -96,12 +364,13 @@ Rules:
 Return ONLY: Low, Medium, High, or Critical"""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=[
+            response = self._chat(
+                "urgency",
+                [
                     {"role": "system", "content": "You are an asset inspection analyst."},
                     {"role": "user", "content": prompt}
                 ],
+                usage,
                 temperature=0.2,
                 max_tokens=10
             )
@@ -111,7 +380,7 @@ Return ONLY: Low, Medium, High, or Critical"""
         except:
             return self._fallback_urgency(status)
     
-    def _create_summary(self, comments: str, status: str, photo_count: int) -> str:
+    def _create_summary(self, comments: str, status: str, photo_count: int, usage: list = None) -> str:
         """Agent 2: Create summary using REAL Azure OpenAI"""
         prompt = f"""Summarize this inspection in 2-3 professional sentences.
 
@@ -122,12 +391,13 @@ Photos: {photo_count}
 Focus on: condition, key findings, recommendations."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=[
+            response = self._chat(
+                "summary",
+                [
                     {"role": "system", "content": "You are a technical writer for inspection reports."},
                     {"role": "user", "content": prompt}
                 ],
+                usage,
                 temperature=0.4,
                 max_tokens=200
             )
@@ -135,74 +405,22 @@ Focus on: condition, key findings, recommendations."""
         except:
             return f"Asset inspection completed with {status} status. {photo_count} photos documented."
     
-    def _generate_structured_output(self, comments: str, status: str, urgency: str) -> dict:
+    def _generate_structured_output(self, comments: str, status: str, urgency: str, usage: list = None) -> dict:
         """Agent 3: Generate structured JSON using REAL Azure OpenAI with example"""
-        
-        example_input = """checked padmount transformer T-892 behind shopping center. all good. no issues. paint is fine, no rust, locks working properly. ground around it is stable. last serviced 6 months ago. cooling fins clean. no unusual sounds or smells. temperature normal. maybe inspect again in a year. everything looks great."""
-        
-        example_output = """{
-  "executive_summary": "Padmount Transformer T-892 is in excellent condition with no issues identified. All components functioning properly, recent service maintenance completed, and no safety concerns present.",
-  "condition_assessment": {
-    "overall_status": "Good",
-    "urgency_level": "Low",
-    "safety_risk": "None"
-  },
-  "findings": [
-    "Exterior paint in good condition",
-    "No corrosion or rust detected",
-    "Security locks functioning properly",
-    "Ground stability confirmed",
-    "Cooling fins clean and unobstructed",
-    "No abnormal sounds detected",
-    "Operating temperature within normal range"
-  ],
-  "issues_identified": [],
-  "recommendations": [
-    "Continue routine inspection schedule",
-    "Next inspection in 12 months"
-  ],
-  "next_actions": {
-    "create_workorder": false,
-    "priority": "Routine",
-    "maintenance_required": false
-  },
-  "safety_notes": "No safety concerns identified. Asset operating safely."
-}"""
-
-        prompt = f"""Convert inspection notes to JSON format.
-
-EXAMPLE INPUT:
-{example_input}
-
-EXAMPLE OUTPUT:
-{example_output}
-
-NOW PROCESS:
-Status: {status}
+        prompt = f"""Status: {status}
 Urgency: {urgency}
-Notes: {comments}
-
-Return ONLY valid JSON with same structure. No markdown."""
+Notes: {comments}"""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=[
-                    {"role": "system", "content": "Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = self._chat(
+                "structured_output",
+                STRUCTURED_OUTPUT_PREFIX + [{"role": "user", "content": prompt}],
+                usage,
                 temperature=0.3,
                 max_tokens=800
             )
             
-            content = response.choices[0].message.content.strip()
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
-            
-            return json.loads(content)
+            return self._parse_json_content(response.choices[0].message.content)
             
         except:
             return {
@@ -0,0 +1,124 @@
+"""
+Voice note audio pipeline
+Probes the uploaded format, normalizes to 16 kHz mono PCM for speech recognition
+and produces a compressed Opus/OGG rendition for storage, using ffmpeg
+"""
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+from typing import Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Magic-byte signatures -> (format, extension, content type)
+AUDIO_SIGNATURES = [
+    (lambda b: b[:4] == b"RIFF" and b[8:12] == b"WAVE", ("wav", "wav", "audio/wav")),
+    (lambda b: b[:4] == b"OggS", ("ogg", "ogg", "audio/ogg")),
+    (lambda b: b[:4] == b"\x1a\x45\xdf\xa3", ("webm", "webm", "audio/webm")),
+    (lambda b: b[:4] == b"fLaC", ("flac", "flac", "audio/flac")),
+    (lambda b: b[4:8] == b"ftyp", ("mp4", "m4a", "audio/mp4")),
+    (lambda b: b[:3] == b"ID3" or (len(b) > 1 and b[0] == 0xFF and b[1] & 0xE0 == 0xE0), ("mp3", "mp3", "audio/mpeg")),
+]
+UNKNOWN_FORMAT = ("unknown", "bin", "application/octet-stream")
+
+RECOGNITION_SAMPLE_RATE = 16000
+
+
+class AudioService:
+    def __init__(self):
+        self.ffmpeg = shutil.which(settings.FFMPEG_PATH)
+        if not self.ffmpeg:
+            logger.warning("ffmpeg not found; voice notes will be stored and transcribed as uploaded")
+
+    def probe_format(self, audio_content: bytes) -> tuple:
+        """Detect (format, extension, content_type) from the file header"""
+        header = audio_content[:16]
+        for matches, audio_format in AUDIO_SIGNATURES:
+            if matches(header):
+                return audio_format
+        return UNKNOWN_FORMAT
+
+    def process_voice(self, audio_content: bytes) -> dict:
+        """
+        Produce the recognition input and the archive rendition of a voice note
+        Both outputs come from a single ffmpeg decode of the upload
+        """
+        source_format, extension, content_type = self.probe_format(audio_content)
+        result = {
+            "source_format": source_format,
+            "recognition_audio": audio_content,
+            "archive_audio": audio_content,
+            "archive_extension": extension,
+            "archive_content_type": content_type,
+            "duration_seconds": None,
+            "compression_ratio": 1.0,
+            "transcode_seconds": 0.0,
+        }
+        if not self.ffmpeg:
+            return result
+
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as work_dir:
+            source_path = os.path.join(work_dir, f"source.{extension}")
+            recognition_path = os.path.join(work_dir, "recognition.wav")
+            archive_path = os.path.join(work_dir, "archive.ogg")
+            with open(source_path, "wb") as f:
+                f.write(audio_content)
+
+            try:
+                completed = subprocess.run(
+                    [
+                        self.ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                        "-i", source_path,
+                        "-ac", "1", "-ar", str(RECOGNITION_SAMPLE_RATE), "-c:a", "pcm_s16le", recognition_path,
+                        "-ac", "1", "-c:a", "libopus", "-b:a", settings.VOICE_ARCHIVE_BITRATE,
+                        "-application", "voip", archive_path,
+                    ],
+                    capture_output=True,
+                    timeout=settings.AUDIO_TRANSCODE_TIMEOUT_SECONDS
+                )
+            except (subprocess.TimeoutExpired, OSError) as e:
+                logger.warning("Voice transcoding failed, keeping original: %s", e)
+                return result
+            if completed.returncode != 0:
+                logger.warning("Voice transcoding failed, keeping original: %s", completed.stderr.decode(errors="replace"))
+                return result
+
+            with open(recognition_path, "rb") as f:
+                recognition_audio = f.read()
+            with open(archive_path, "rb") as f:
+                archive_audio = f.read()
+
+        result.update({
+            "recognition_audio": recognition_audio,
+            "archive_audio": archive_audio,
+            "archive_extension": "ogg",
+            "archive_content_type": "audio/ogg",
+            "duration_seconds": self._wav_duration(recognition_audio),
+            "compression_ratio": len(audio_content) / max(len(archive_audio), 1),
+            "transcode_seconds": time.perf_counter() - start,
+        })
+        return result
+
+    def _wav_duration(self, wav_content: bytes) -> Optional[float]:
+        """Duration from the WAV frame count; ffmpeg may write extra header chunks (e.g. LIST)"""
+        try:
+            with wave.open(io.BytesIO(wav_content), "rb") as wav:
+                return wav.getnframes() / wav.getframerate()
+        except (wave.Error, EOFError) as e:
+            logger.warning("Could not read recognition audio duration: %s", e)
+            return None
+
+    def transcode_seconds_per_minute(self, processed: dict) -> float:
+        """Transcoding time normalized to one minute of audio"""
+        if not processed["duration_seconds"]:
+            return 0.0
+        return processed["transcode_seconds"] * 60 / processed["duration_seconds"]
+
+audio_service = AudioService()
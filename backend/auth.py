@@ -0,0 +1,241 @@
+"""
+Authentication: signed session tokens, cached employee lookup and revocation
+"""
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import jwt, JWTError
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import logging
+import secrets
+import threading
+import time
+import uuid
+
+from config import settings
+from database import db
+from models import AuthenticatedEmployee
+from events import event_hub
+from storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+STREAM_TICKET_TYPE = "stream"
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# Tokens must verify on every worker, so a shared key is required outside development
+if not settings.JWT_SECRET_KEY:
+    if not settings.DEV_MODE:
+        raise RuntimeError("JWT_SECRET_KEY is not set; set it (shared by all workers) or enable DEV_MODE")
+    logger.warning(
+        "JWT_SECRET_KEY is not set; DEV_MODE is using a random per-process key. "
+        "Tokens will not verify across workers or restarts."
+    )
+    settings.JWT_SECRET_KEY = secrets.token_urlsafe(32)
+
+
+class EmployeeCache:
+    """Small TTL cache of employee records, keyed by id and username"""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._by_id = {}
+        self._by_username = {}
+        self._lock = threading.Lock()
+
+    def _load(self, column: str, value) -> Optional[dict]:
+        results = db.execute_query(
+            f"SELECT employee_id, username, full_name, role FROM employees WHERE {column} = ?",
+            (value,)
+        )
+        if not results:
+            return None
+        row = results[0]
+        employee = {"employee_id": row[0], "username": row[1], "full_name": row[2], "role": row[3]}
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._by_id[employee["employee_id"]] = (expires, employee)
+            self._by_username[employee["username"]] = (expires, employee)
+        return employee
+
+    def _cached(self, store: dict, key) -> Optional[dict]:
+        with self._lock:
+            entry = store.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def get(self, employee_id: int) -> Optional[dict]:
+        """Employee record by id, hitting the database only on a miss"""
+        return self._cached(self._by_id, employee_id) or self._load("employee_id", employee_id)
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        """Employee record by username, hitting the database only on a miss"""
+        return self._cached(self._by_username, username) or self._load("username", username)
+
+    def invalidate(self, employee_id: int):
+        with self._lock:
+            entry = self._by_id.pop(employee_id, None)
+            if entry:
+                self._by_username.pop(entry[1]["username"], None)
+
+
+class RevocationList:
+    """In-memory set of revoked token ids, pruned once tokens would have expired anyway"""
+
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, token_id: str, expires_at: float):
+        with self._lock:
+            self._revoked[token_id] = expires_at
+            now = time.time()
+            for expired in [jti for jti, exp in self._revoked.items() if exp < now]:
+                del self._revoked[expired]
+
+    def is_revoked(self, token_id: str) -> bool:
+        return token_id in self._revoked
+
+
+employee_cache = EmployeeCache(settings.EMPLOYEE_CACHE_TTL_SECONDS)
+revocation_list = RevocationList()
+
+
+def create_access_token(employee_id: int, role: str) -> str:
+    """Issue a signed token carrying the employee id and role"""
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": str(employee_id),
+        "role": role,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    }
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def verify_token(token: str) -> AuthenticatedEmployee:
+    """Check signature, expiry and revocation without touching the database"""
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        if "typ" in payload:
+            raise JWTError("Not a session token")
+        employee = AuthenticatedEmployee(
+            employee_id=int(payload["sub"]),
+            role=payload["role"],
+            token_id=payload["jti"],
+            expires_at=payload["exp"]
+        )
+    except (JWTError, KeyError, ValueError):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    if revocation_list.is_revoked(employee.token_id):
+        raise HTTPException(
+            status_code=401,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return employee
+
+
+def create_stream_ticket(employee: AuthenticatedEmployee, topics: set) -> str:
+    """Issue a short-lived, single-use ticket that opens one live-update stream on the given topics"""
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": str(employee.employee_id),
+        "typ": STREAM_TICKET_TYPE,
+        "topics": sorted(topics),
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(seconds=settings.LIVE_TICKET_TTL_SECONDS),
+    }
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+async def _claim_stream_ticket(token_id: str, expires_at: float) -> bool:
+    """
+    Mark a ticket as used; False if it already was. With a broker the claim is shared
+    by every worker, otherwise it only holds within this process
+    """
+    if event_hub.has_broker:
+        try:
+            return await event_hub.claim_once(f"ticket:{token_id}", max(int(expires_at - time.time()), 1))
+        except Exception as e:
+            logger.warning("Could not record stream ticket in the broker: %s", e)
+            raise HTTPException(status_code=503, detail="Live updates are temporarily unavailable")
+
+    if revocation_list.is_revoked(token_id):
+        return False
+    revocation_list.revoke(token_id, expires_at)
+    return True
+
+
+async def redeem_stream_ticket(ticket: str) -> set:
+    """Check a stream ticket and consume it; returns the topics it grants"""
+    try:
+        payload = jwt.decode(ticket, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        if payload.get("typ") != STREAM_TICKET_TYPE:
+            raise JWTError("Not a stream ticket")
+        topics, token_id, expires_at = set(payload["topics"]), payload["jti"], payload["exp"]
+    except (JWTError, KeyError, TypeError):
+        raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+
+    if not await _claim_stream_ticket(token_id, expires_at):
+        raise HTTPException(status_code=401, detail="Stream ticket already used")
+    return topics
+
+
+def get_current_employee(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+) -> AuthenticatedEmployee:
+    """FastAPI dependency: the employee identified by the bearer token"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return verify_token(credentials.credentials)
+
+
+def has_elevated_role(employee: AuthenticatedEmployee) -> bool:
+    """Whether the employee may act on other employees' data, using the cached record"""
+    record = employee_cache.get(employee.employee_id)
+    return bool(record) and record["role"] in settings.ELEVATED_ROLES
+
+
+def require_self_or_elevated(employee: AuthenticatedEmployee, employee_id: int):
+    """Raise 403 unless the token belongs to employee_id or carries an elevated role"""
+    if employee.employee_id == employee_id:
+        return
+    if employee.role in settings.ELEVATED_ROLES and has_elevated_role(employee):
+        return
+    raise HTTPException(status_code=403, detail="Not permitted for this employee")
+
+
+def require_file_access(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)
+):
+    """
+    FastAPI dependency for /api/files: a valid signed URL or a bearer token
+    Signed URLs let <img>/<audio> tags load files without an Authorization header
+    """
+    path = request.url.path[len("/api/files/"):]
+    params = request.query_params
+    if "sig" in params and storage_service.verify_signature(path, params.get("exp"), params.get("sig")):
+        return
+    if credentials is not None:
+        verify_token(credentials.credentials)
+        return
+    raise HTTPException(
+        status_code=401,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
@@ -0,0 +1,55 @@
+"""
+Benchmark: voice note compression ratio and transcoding time per minute of audio
+Requires ffmpeg with libopus on the PATH (or FFMPEG_PATH)
+
+Run from the backend directory:
+    python -m benchmarks.bench_audio_transcoding [seconds ...]
+"""
+import io
+import math
+import random
+import sys
+import wave
+
+from audio_service import audio_service
+
+
+def make_wav(seconds: int, sample_rate: int = 44100, channels: int = 2) -> bytes:
+    """Synthetic speech-band PCM recording, shaped like a raw phone upload"""
+    rng = random.Random(seconds)
+    frames = bytearray()
+    for i in range(seconds * sample_rate):
+        t = i / sample_rate
+        # Syllable-rate envelope over a few voice-band tones plus noise
+        envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 4 * t)
+        value = envelope * (0.4 * math.sin(2 * math.pi * 180 * t) + 0.2 * math.sin(2 * math.pi * 720 * t))
+        value += rng.uniform(-0.05, 0.05)
+        sample = int(max(-1.0, min(1.0, value)) * 32767).to_bytes(2, "little", signed=True)
+        frames += sample * channels
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def main():
+    if not audio_service.ffmpeg:
+        print("ffmpeg not found; nothing to measure")
+        return
+
+    durations = [int(arg) for arg in sys.argv[1:]] or [30, 60, 180]
+    print(f"{'seconds':>8} {'source KB':>10} {'opus KB':>8} {'ratio':>7} {'16k wav KB':>11} {'s/min':>7}")
+    for seconds in durations:
+        source = make_wav(seconds)
+        processed = audio_service.process_voice(source)
+        print(f"{seconds:>8} {len(source) / 1024:>10.0f} {len(processed['archive_audio']) / 1024:>8.0f} "
+              f"{processed['compression_ratio']:>6.1f}x {len(processed['recognition_audio']) / 1024:>11.0f} "
+              f"{audio_service.transcode_seconds_per_minute(processed):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
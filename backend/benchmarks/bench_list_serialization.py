@@ -0,0 +1,82 @@
+"""
+Microbenchmark: list endpoint serialization
+Compares the Pydantic model + response_model path with the fast row-to-JSON path
+
+Run from the backend directory:
+    python -m benchmarks.bench_list_serialization [rows]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+import json
+
+from models import ScheduledInspection
+from fast_response import rows_to_dicts, encode_json, compress_body
+
+COLUMNS = ("schedule_id", "asset_id", "asset_name", "asset_type",
+           "location", "scheduled_date", "last_inspection_date")
+
+
+def make_rows(count: int) -> list:
+    """Synthetic rows shaped like the scheduled inspections query"""
+    base = datetime(2024, 1, 1, 8, 30)
+    return [
+        (i, 1000 + i, f"Transformer T-{i}", "Padmount Transformer",
+         f"Substation {i % 50}, Feeder {i % 7}", base + timedelta(days=i % 90),
+         base - timedelta(days=180 + i % 30) if i % 3 else None)
+        for i in range(count)
+    ]
+
+
+def model_path(rows: list) -> bytes:
+    """Current path: one model per row, then FastAPI-style validation and encoding"""
+    adapter = TypeAdapter(List[ScheduledInspection])
+    models = [
+        ScheduledInspection(
+            schedule_id=row[0],
+            asset_id=row[1],
+            asset_name=row[2],
+            asset_type=row[3],
+            location=row[4],
+            scheduled_date=row[5],
+            last_inspection_date=row[6]
+        )
+        for row in rows
+    ]
+    validated = adapter.validate_python(models, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def fast_path(rows: list) -> bytes:
+    """New path: rows mapped by column position and encoded in one call"""
+    return encode_json(rows_to_dicts(rows, COLUMNS))
+
+
+def timeit(func, rows: list, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 1000, 10000]
+    print(f"{'rows':>8} {'model (ms)':>12} {'fast (ms)':>12} {'speedup':>8} {'json KB':>8} {'gzip KB':>8}")
+    for count in sizes:
+        rows = make_rows(count)
+        model_time = timeit(model_path, rows)
+        fast_time = timeit(fast_path, rows)
+        body = fast_path(rows)
+        compressed, _ = compress_body(body, "gzip")
+        print(f"{count:>8} {model_time * 1000:>12.2f} {fast_time * 1000:>12.2f} "
+              f"{model_time / fast_time:>7.1f}x {len(body) / 1024:>8.1f} {len(compressed) / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
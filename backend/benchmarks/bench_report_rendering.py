@@ -0,0 +1,57 @@
+"""
+Benchmark: PDF report render time against row count and worker count
+
+Run from the backend directory (reports are rendered, not uploaded):
+    STORAGE_BACKEND=local python -m benchmarks.bench_report_rendering [rows ...]
+"""
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import os
+
+from config import settings
+from report_service import report_service, POOL_CONTEXT
+
+STATUSES = [("Good", "Low"), ("Fair", "Medium"), ("Poor", "High"), ("Critical", "Critical")]
+
+
+def make_audits(count: int) -> list:
+    """Synthetic rows shaped like the report query"""
+    base = datetime(2024, 1, 1)
+    audits = []
+    for i in range(count):
+        status, urgency = STATUSES[i % len(STATUSES)]
+        audits.append((
+            i, f"Transformer T-{i}", "Padmount Transformer", f"Substation {i % 50}",
+            base + timedelta(hours=i), status, urgency,
+            "Cooling fins partially obstructed; minor corrosion on the lower cabinet door. "
+            "Recommend cleaning and touch-up paint at next scheduled visit.",
+            "John Doe"
+        ))
+    return audits
+
+
+def main():
+    row_counts = [int(arg) for arg in sys.argv[1:]] or [500, 2000, 8000]
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+
+    # Force the pooled path so worker counts are comparable at every size
+    settings.REPORT_PARALLEL_MIN_ROWS = 0
+
+    print(f"{'rows':>8} {'workers':>8} {'seconds':>9} {'rows/s':>9} {'KB':>8}")
+    for rows in row_counts:
+        audits = make_audits(rows)
+        for workers in worker_counts:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT) as executor:
+                # Warm the pool so process start-up is not counted
+                list(executor.map(abs, range(workers)))
+                start = time.perf_counter()
+                pdf = report_service.render_pdf(audits, "2024-01-01", "2024-12-31", executor=executor)
+                elapsed = time.perf_counter() - start
+            print(f"{rows:>8} {workers:>8} {elapsed:>9.2f} {rows / elapsed:>9.0f} {len(pdf) / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
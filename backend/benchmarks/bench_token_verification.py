@@ -0,0 +1,37 @@
+"""
+Microbenchmark: session token verification throughput
+Measures the per-request cost of the get_current_employee check (no database access)
+
+Run from the backend directory:
+    DEV_MODE=true python -m benchmarks.bench_token_verification [iterations]
+"""
+import sys
+import time
+
+from auth import create_access_token, verify_token, revocation_list
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    token = create_access_token(1, "Inspector")
+
+    # Populate the revocation list so lookups run against a realistic size
+    for i in range(1000):
+        revocation_list.revoke(f"revoked-{i}", time.time() + 3600)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        create_access_token(1, "Inspector")
+    issue_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verify_token(token)
+    verify_time = time.perf_counter() - start
+
+    print(f"issue:  {iterations / issue_time:>10,.0f} tokens/s  ({issue_time / iterations * 1e6:.1f} us each)")
+    print(f"verify: {iterations / verify_time:>10,.0f} tokens/s  ({verify_time / iterations * 1e6:.1f} us each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,22 @@ class Settings:
     # Azure Storage
     STORAGE_CONNECTION_STRING = os.getenv("STORAGE_CONNECTION_STRING")
     
+    # Storage backend: "azure" or "local"
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "azure")
+    LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", "./storage")
+    PHOTO_CONTAINER = os.getenv("PHOTO_CONTAINER", "inspection-photos")
+    VOICE_CONTAINER = os.getenv("VOICE_CONTAINER", "voice-recordings")
+    REPORT_CONTAINER = os.getenv("REPORT_CONTAINER", "audit-reports")
+    RENDITION_CONTAINER = os.getenv("RENDITION_CONTAINER", "photo-renditions")
+    
+    # Batch uploads
+    UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", "20"))
+    UPLOAD_MAX_CONCURRENCY = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "8"))
+    UPLOAD_CONNECTION_POOL_SIZE = int(os.getenv("UPLOAD_CONNECTION_POOL_SIZE", "32"))
+    
+    # Public base URL of this API, used for file and rendition links
+    PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", "http://localhost:8000")
+    
     # Azure SQL Database
     SQL_CONNECTION_STRING = os.getenv("SQL_CONNECTION_STRING")
     
@@ -19,6 +35,28 @@ class Settings:
     AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1")
     AZURE_OPENAI_API_VERSION = "2024-12-01-preview"
     
+    # Vision: photos are downscaled before upload to the model; larger sets use per-image mode
+    AI_VISION_MAX_EDGE = int(os.getenv("AI_VISION_MAX_EDGE", "1024"))
+    AI_VISION_DETAIL = os.getenv("AI_VISION_DETAIL", "auto")
+    AI_VISION_BATCH_MAX_IMAGES = int(os.getenv("AI_VISION_BATCH_MAX_IMAGES", "10"))
+    AI_VISION_MAX_CONCURRENCY = int(os.getenv("AI_VISION_MAX_CONCURRENCY", "4"))
+    # How long upload-time photo notes are kept for the audit's combined assessment
+    AI_PHOTO_NOTES_TTL_SECONDS = int(os.getenv("AI_PHOTO_NOTES_TTL_SECONDS", "43200"))
+    
+    # Voice notes: archived as Opus/OGG, recognized from 16 kHz mono PCM
+    FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+    VOICE_ARCHIVE_BITRATE = os.getenv("VOICE_ARCHIVE_BITRATE", "24k")
+    AUDIO_TRANSCODE_TIMEOUT_SECONDS = int(os.getenv("AUDIO_TRANSCODE_TIMEOUT_SECONDS", "120"))
+    
+    # Token budgets for inspector comments, per AI agent (the urgency agent always
+    # gets the full comments, which compaction keeps under AI_PRESUMMARIZE_THRESHOLD)
+    AI_COMMENT_TOKEN_BUDGETS = {
+        "summary": int(os.getenv("AI_SUMMARY_COMMENT_BUDGET", "800")),
+        "structured_output": int(os.getenv("AI_STRUCTURED_COMMENT_BUDGET", "1200")),
+    }
+    # Comments above this many tokens are condensed once per audit before the agents run
+    AI_PRESUMMARIZE_THRESHOLD = int(os.getenv("AI_PRESUMMARIZE_THRESHOLD", "2000"))
+    
     # Azure Speech
     AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
     AZURE_SPEECH_REGION = os.getenv("AZURE_SPEECH_REGION")
@@ -27,6 +65,35 @@ class Settings:
     APP_NAME = "Asset Inspection System"
     VERSION = "1.0.0"
     
+    # Authentication: JWT_SECRET_KEY must be the same for every worker and replica.
+    # It is required unless DEV_MODE is set, which falls back to a random per-process key.
+    DEV_MODE = os.getenv("DEV_MODE", "false").lower() in ("1", "true", "yes")
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+    JWT_ALGORITHM = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "480"))
+    EMPLOYEE_CACHE_TTL_SECONDS = int(os.getenv("EMPLOYEE_CACHE_TTL_SECONDS", "300"))
+    ELEVATED_ROLES = [role.strip() for role in os.getenv("ELEVATED_ROLES", "Supervisor,Admin").split(",") if role.strip()]
+    # Lifetime window of signed /api/files URLs
+    FILE_URL_TTL_SECONDS = int(os.getenv("FILE_URL_TTL_SECONDS", "900"))
+    
+    # PDF reports: audits per rendered segment, and the row count above which segments render in parallel
+    REPORT_SEGMENT_ROWS = int(os.getenv("REPORT_SEGMENT_ROWS", "400"))
+    REPORT_PARALLEL_MIN_ROWS = int(os.getenv("REPORT_PARALLEL_MIN_ROWS", "800"))
+    REPORT_RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "0"))  # 0 = one per CPU
+    
+    # Live updates (set EVENT_BROKER_URL, e.g. redis://localhost:6379, to share events across workers)
+    EVENT_BROKER_URL = os.getenv("EVENT_BROKER_URL")
+    EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+    EVENT_HEARTBEAT_SECONDS = int(os.getenv("EVENT_HEARTBEAT_SECONDS", "20"))
+    # Lifetime of the single-use tickets that open a live-update stream (single use is
+    # enforced across workers through EVENT_BROKER_URL, otherwise per process)
+    LIVE_TICKET_TTL_SECONDS = int(os.getenv("LIVE_TICKET_TTL_SECONDS", "60"))
+    
+    # Fast list responses (compression applies above the threshold, in bytes)
+    FAST_RESPONSE_COMPRESSION_THRESHOLD = int(os.getenv("FAST_RESPONSE_COMPRESSION_THRESHOLD", "1024"))
+    FAST_RESPONSE_GZIP_LEVEL = int(os.getenv("FAST_RESPONSE_GZIP_LEVEL", "5"))
+    FAST_RESPONSE_BROTLI_QUALITY = int(os.getenv("FAST_RESPONSE_BROTLI_QUALITY", "4"))
+    
     # CORS
     CORS_ORIGINS = ["*"]  # Update in production
 
@@ -0,0 +1,169 @@
+"""
+Publish/subscribe hub for live schedule and audit updates
+Events fan out to WebSocket/SSE subscribers in this worker; with EVENT_BROKER_URL
+set they go through a Redis channel so every worker receives them
+"""
+from typing import Optional
+import asyncio
+import logging
+
+from config import settings
+from fast_response import encode_json
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - broker is optional
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+BROKER_CHANNEL = "asset-inspection-events"
+
+
+def employee_topic(employee_id: int) -> str:
+    return f"employee:{employee_id}"
+
+
+def asset_topic(asset_id: int) -> str:
+    return f"asset:{asset_id}"
+
+
+class Subscription:
+    """A client's bounded event queue; the oldest events are dropped if it falls behind"""
+
+    def __init__(self, hub: "EventHub", topics: set):
+        self.hub = hub
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=settings.EVENT_QUEUE_SIZE)
+
+    def deliver(self, message: bytes):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float) -> Optional[bytes]:
+        """Next encoded event, or None if nothing arrived within timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    def __init__(self):
+        self._subscribers = {}
+        self._loop = None
+        self._redis = None
+        self._listener = None
+        self._pending = set()
+
+    async def start(self):
+        """Bind to the running event loop and connect to the broker if configured"""
+        self._loop = asyncio.get_running_loop()
+        if settings.EVENT_BROKER_URL:
+            if aioredis is None:
+                raise RuntimeError("EVENT_BROKER_URL is set but the redis package is not installed")
+            self._redis = aioredis.from_url(settings.EVENT_BROKER_URL)
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis:
+            await self._redis.close()
+            self._redis = None
+
+    def subscribe(self, topics: set) -> Subscription:
+        subscription = Subscription(self, topics)
+        for topic in topics:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    @property
+    def has_broker(self) -> bool:
+        return self._redis is not None
+
+    async def claim_once(self, key: str, ttl_seconds: int) -> bool:
+        """Atomically record a one-time key in the broker, shared by all workers; False if already claimed"""
+        return bool(await self._redis.set(f"{BROKER_CHANNEL}:claimed:{key}", 1, nx=True, ex=ttl_seconds))
+
+    @property
+    def subscriber_count(self) -> int:
+        return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+    def publish(self, topic: str, event_type: str, data: dict):
+        """
+        Publish an event to a topic; safe to call from the event loop or a worker thread
+        The payload is encoded once and shared by every subscriber
+        """
+        if self._loop is None:
+            return
+        message = encode_json({"type": event_type, "topic": topic, "data": data})
+        if self._redis is not None:
+            self._call_in_loop(self._publish_to_broker, topic, message)
+        else:
+            self._call_in_loop(self._fan_out, topic, message)
+
+    def _call_in_loop(self, callback, *args):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _fan_out(self, topic: str, message: bytes):
+        for subscription in tuple(self._subscribers.get(topic, ())):
+            subscription.deliver(message)
+
+    def _publish_to_broker(self, topic: str, message: bytes):
+        # Topic travels as a length-prefixed header so listeners avoid re-parsing the JSON
+        header = topic.encode("utf-8")
+        payload = len(header).to_bytes(2, "big") + header + message
+        task = asyncio.create_task(self._redis.publish(BROKER_CHANNEL, payload))
+        self._pending.add(task)
+        task.add_done_callback(self._publish_done)
+
+    def _publish_done(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Live event publish to broker failed: %s", task.exception())
+
+    async def _listen(self):
+        """Receive broker events (including our own) and fan them out locally"""
+        while True:
+            try:
+                # Closing the pubsub on every exit returns its connection before retrying
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(BROKER_CHANNEL)
+                    async for item in pubsub.listen():
+                        if item["type"] != "message":
+                            continue
+                        payload = item["data"]
+                        size = int.from_bytes(payload[:2], "big")
+                        self._fan_out(payload[2:2 + size].decode("utf-8"), payload[2 + size:])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Event broker connection lost, retrying: %s", e)
+                await asyncio.sleep(1)
+
+
+event_hub = EventHub()
@@ -0,0 +1,119 @@
+"""
+Fast JSON response path for list endpoints
+Maps cursor rows to dicts by column position and encodes them in one pass,
+skipping per-row Pydantic construction and response_model re-validation
+"""
+from fastapi import Response
+from datetime import date, datetime
+from decimal import Decimal
+import gzip
+import json
+from config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional compression
+    brotli = None
+
+
+def _default(value):
+    """Fallback encoder for the stdlib json path"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+def rows_to_dicts(rows, columns: tuple, defaults: dict = None) -> list:
+    """
+    Map cursor rows to dicts by column position
+    `columns` lists the response field names in SELECT order; `defaults`
+    supplies a replacement for falsy values in the named fields
+    """
+    if defaults:
+        fallback = [(i, defaults[name]) for i, name in enumerate(columns) if name in defaults]
+        records = []
+        for row in rows:
+            record = dict(zip(columns, row))
+            for i, value in fallback:
+                if not row[i]:
+                    record[columns[i]] = value
+            records.append(record)
+        return records
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def encode_json(payload) -> bytes:
+    """Encode payload to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def compress_body(body: bytes, accept_encoding: str) -> tuple:
+    """
+    Compress body if it exceeds the configured threshold and the client accepts it
+    Returns (body, content_encoding or None)
+    """
+    if len(body) < settings.FAST_RESPONSE_COMPRESSION_THRESHOLD or not accept_encoding:
+        return body, None
+
+    accepted = _parse_accept_encoding(accept_encoding)
+    if brotli is not None and accepted("br"):
+        return brotli.compress(body, quality=settings.FAST_RESPONSE_BROTLI_QUALITY), "br"
+    if accepted("gzip"):
+        return gzip.compress(body, compresslevel=settings.FAST_RESPONSE_GZIP_LEVEL), "gzip"
+    return body, None
+
+
+def _parse_accept_encoding(accept_encoding: str):
+    """
+    Parse Accept-Encoding q-values; returns a predicate telling whether a coding is acceptable
+    A coding with q=0 is refused, and "*" covers codings that are not listed
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+
+    def accepted(coding: str) -> bool:
+        return qualities.get(coding, qualities.get("*", 0.0)) > 0
+
+    return accepted
+
+
+class FastJSONResponse(Response):
+    """
+    Pre-encoded JSON response
+    Returning a Response instance makes FastAPI skip response_model validation,
+    while the route's response_model still drives the OpenAPI schema
+    """
+    media_type = "application/json"
+
+    def __init__(self, body: bytes, accept_encoding: str = "", status_code: int = 200):
+        body, encoding = compress_body(body, accept_encoding)
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        super().__init__(content=body, status_code=status_code, headers=headers)
+
+
+def fast_list_response(rows, columns: tuple, accept_encoding: str = "", defaults: dict = None) -> FastJSONResponse:
+    """Build a FastJSONResponse straight from cursor rows"""
+    return FastJSONResponse(encode_json(rows_to_dicts(rows, columns, defaults)), accept_encoding)
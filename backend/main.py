@@ -5,9 +5,15 @@ Main application entry point
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+import logging
 
 from config import settings
 from routes import router
+from storage_service import storage_service
+from events import event_hub
+from report_service import report_service
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
 # Initialize FastAPI app
 app = FastAPI(title=settings.APP_NAME, version=settings.VERSION)
@@ -24,6 +30,16 @@ app.add_middleware(
 # Include routes
 app.include_router(router)
 
+@app.on_event("startup")
+async def startup():
+    await event_hub.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await event_hub.stop()
+    await storage_service.close()
+    report_service.shutdown()
+
 # Root endpoint
 @app.get("/")
 def read_root():
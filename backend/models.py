@@ -16,6 +16,12 @@ class LoginResponse(BaseModel):
     role: str
     token: str
 
+class AuthenticatedEmployee(BaseModel):
+    employee_id: int
+    role: str
+    token_id: str
+    expires_at: float
+
 class ScheduledInspection(BaseModel):
     schedule_id: int
     asset_id: int
@@ -34,12 +40,18 @@ class AssetDetail(BaseModel):
     last_inspection_date: Optional[datetime] = None
     status: str
 
+class PhotoRendition(BaseModel):
+    url: str
+    thumbnail_url: str
+    preview_url: str
+
 class AuditHistory(BaseModel):
     audit_id: int
     inspection_date: datetime
     audit_status: str
     urgency_level: str
     summary: str
+    photos: List[PhotoRendition] = []
 
 class AuditSubmission(BaseModel):
     asset_id: int
@@ -57,6 +69,22 @@ class AIAnalysisResult(BaseModel):
 class PhotoUploadResponse(BaseModel):
     url: str
     ai_notes: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
+
+class PhotoUploadResult(BaseModel):
+    index: int
+    filename: str
+    url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
+    ai_notes: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchPhotoUploadResponse(BaseModel):
+    uploaded: List[PhotoUploadResult]
+    failed: List[PhotoUploadResult]
+    combined_assessment: Optional[str] = None
 
 class VoiceUploadResponse(BaseModel):
     url: str
@@ -73,6 +101,10 @@ class ReportFilter(BaseModel):
     urgency_level: Optional[str] = None
     workflow_status: Optional[str] = None
 
+class LiveTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int
+
 class ReportResponse(BaseModel):
     report_url: str
     total_audits: int
\ No newline at end of file
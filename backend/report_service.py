@@ -1,76 +1,212 @@
 """
 PDF Report Generation Service
+Large reports are split into page-range segments rendered in a process pool,
+then merged behind a summary front page and stamped with page numbers
 """
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas as pdf_canvas
+from pypdf import PdfReader, PdfWriter
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from functools import partial
+from itertools import repeat
 from datetime import datetime
 import io
+import multiprocessing
+import os
+import threading
+from config import settings
 from storage_service import storage_service
 
+PAGE_WIDTH, PAGE_HEIGHT = letter
+BRAND_COLOR = colors.HexColor('#1e40af')
+
+# Workers must not be forked from the server process: its threads (request thread
+# pool, SDK clients) can hold locks that the child would inherit in a locked state
+POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _draw_header(title: str, canvas, doc):
+    """Running header drawn on every table page"""
+    canvas.saveState()
+    canvas.setFont('Helvetica-Bold', 9)
+    canvas.setFillColor(BRAND_COLOR)
+    canvas.drawString(doc.leftMargin, PAGE_HEIGHT - 0.5*inch, title)
+    canvas.setStrokeColor(BRAND_COLOR)
+    canvas.line(doc.leftMargin, PAGE_HEIGHT - 0.55*inch, PAGE_WIDTH - doc.rightMargin, PAGE_HEIGHT - 0.55*inch)
+    canvas.restoreState()
+
+
+def _audit_table(audits: list, styles) -> Table:
+    table_data = [['Asset', 'Date', 'Status', 'Urgency', 'Inspector', 'Summary']]
+
+    for audit in audits:
+        summary = audit[7] or ''
+        table_data.append([
+            Paragraph(f"<b>{audit[1]}</b><br/>{audit[2]}", styles['Normal']),
+            audit[4].strftime('%Y-%m-%d'),
+            audit[5],
+            audit[6],
+            audit[8],
+            Paragraph(summary[:100] + '...' if len(summary) > 100 else summary, styles['Normal'])
+        ])
+
+    # repeatRows keeps the column header on every page of the segment
+    table = Table(
+        table_data,
+        colWidths=[1.5*inch, 1*inch, 0.8*inch, 0.8*inch, 1.2*inch, 2.2*inch],
+        repeatRows=1
+    )
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), BRAND_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+    ]))
+    return table
+
+
+def _render_segment(audits: list, header: str) -> bytes:
+    """Render one segment of the audit table; runs in a worker process"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.9*inch)
+    draw_header = partial(_draw_header, header)
+    doc.build([_audit_table(audits, getSampleStyleSheet())], onFirstPage=draw_header, onLaterPages=draw_header)
+    return buffer.getvalue()
+
+
 class ReportService:
+    def __init__(self):
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Process pool created on first parallel render; renders run on request threads"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.REPORT_RENDER_WORKERS or os.cpu_count(),
+                    mp_context=POOL_CONTEXT
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
     def generate_pdf_report(self, audits: list, filters) -> str:
         """Generate PDF report from audit data"""
-        pdf_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
+        pdf_content = self.render_pdf(audits, filters.start_date, filters.end_date)
+
+        # Upload to blob storage
+        blob_name = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        report_url = storage_service.upload_report(pdf_content, blob_name)
+
+        return report_url
+
+    def render_pdf(self, audits: list, start_date: str, end_date: str, executor=None) -> bytes:
+        """
+        Render the full report: summary front page, table segments, page numbers
+        Segments render in the process pool once the report exceeds REPORT_PARALLEL_MIN_ROWS;
+        pass `executor` to use a specific pool
+        """
+        # Cursor rows are not picklable; plain tuples are
+        audits = [tuple(audit) for audit in audits]
+        header = f"Asset Inspection Report  |  {start_date} to {end_date}"
+
+        size = settings.REPORT_SEGMENT_ROWS
+        segments = [audits[i:i + size] for i in range(0, len(audits), size)]
+
+        if len(audits) >= settings.REPORT_PARALLEL_MIN_ROWS and len(segments) > 1:
+            executor = executor or self._get_executor()
+            parts = list(executor.map(_render_segment, segments, repeat(header)))
+        else:
+            parts = [_render_segment(segment, header) for segment in segments]
+
+        return self._merge([self._render_front_page(audits, start_date, end_date)] + parts)
+
+    def _render_front_page(self, audits: list, start_date: str, end_date: str) -> bytes:
+        """Summary front page with totals by urgency and status"""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter)
         elements = []
         styles = getSampleStyleSheet()
-        
+
         # Title
         title_style = ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=24,
-            textColor=colors.HexColor('#1e40af'),
+            textColor=BRAND_COLOR,
             spaceAfter=30,
             alignment=1
         )
         elements.append(Paragraph("Asset Inspection Report", title_style))
         elements.append(Spacer(1, 0.25*inch))
-        
+
         # Report Info
         info_style = styles['Normal']
         elements.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", info_style))
-        elements.append(Paragraph(f"<b>Date Range:</b> {filters.start_date} to {filters.end_date}", info_style))
+        elements.append(Paragraph(f"<b>Date Range:</b> {start_date} to {end_date}", info_style))
         elements.append(Paragraph(f"<b>Total Audits:</b> {len(audits)}", info_style))
         elements.append(Spacer(1, 0.5*inch))
-        
-        # Table
-        table_data = [['Asset', 'Date', 'Status', 'Urgency', 'Inspector', 'Summary']]
-        
-        for audit in audits:
-            table_data.append([
-                Paragraph(f"<b>{audit[1]}</b><br/>{audit[2]}", styles['Normal']),
-                audit[4].strftime('%Y-%m-%d'),
-                audit[5],
-                audit[6],
-                audit[8],
-                Paragraph(audit[7][:100] + '...' if len(audit[7]) > 100 else audit[7], styles['Normal'])
-            ])
-        
-        table = Table(table_data, colWidths=[1.5*inch, 1*inch, 0.8*inch, 0.8*inch, 1.2*inch, 2.2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+
+        # Summary counts
+        urgency_counts = Counter(audit[6] for audit in audits)
+        status_counts = Counter(audit[5] for audit in audits)
+        summary_data = [['Urgency', 'Audits', 'Status', 'Audits']]
+        for urgency, status in zip(['Critical', 'High', 'Medium', 'Low'], ['Critical', 'Poor', 'Fair', 'Good']):
+            summary_data.append([urgency, urgency_counts.get(urgency, 0), status, status_counts.get(status, 0)])
+
+        summary_table = Table(summary_data, colWidths=[1.5*inch, 1*inch, 1.5*inch, 1*inch])
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), BRAND_COLOR),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
             ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
             ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
         ]))
-        
-        elements.append(table)
+        elements.append(summary_table)
+
         doc.build(elements)
-        
-        # Upload to blob storage
-        pdf_buffer.seek(0)
-        blob_name = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        report_url = storage_service.upload_report(pdf_buffer.read(), blob_name)
-        
-        return report_url
+        return buffer.getvalue()
+
+    def _merge(self, parts: list) -> bytes:
+        """Concatenate rendered parts and stamp "Page X of Y" on every page"""
+        writer = PdfWriter()
+        for part in parts:
+            for page in PdfReader(io.BytesIO(part)).pages:
+                writer.add_page(page)
+
+        # One overlay document with a page number per page, drawn in a single pass
+        total = len(writer.pages)
+        overlay_buffer = io.BytesIO()
+        overlay = pdf_canvas.Canvas(overlay_buffer, pagesize=letter)
+        for number in range(1, total + 1):
+            overlay.setFont('Helvetica', 8)
+            overlay.drawRightString(PAGE_WIDTH - 0.75*inch, 0.5*inch, f"Page {number} of {total}")
+            overlay.showPage()
+        overlay.save()
+
+        overlay_pages = PdfReader(io.BytesIO(overlay_buffer.getvalue())).pages
+        for page, overlay_page in zip(writer.pages, overlay_pages):
+            page.merge_page(overlay_page)
+
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
 
-report_service = ReportService()
\ No newline at end of file
+report_service = ReportService()
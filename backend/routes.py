@@ -1,70 +1,90 @@
 """
 API Routes
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List
-import uuid
+from fastapi import (
+    APIRouter, UploadFile, File, Form, HTTPException, Request, Depends, WebSocket, WebSocketDisconnect
+)
+from fastapi.responses import Response, FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import contextlib
+import logging
+import mimetypes
 import json
 
 from models import *
+from config import settings
 from database import db
-from storage_service import storage_service
+from storage_service import storage_service, RENDITIONS
 from ai_service import ai_service
 from speech_service import speech_service
+from audio_service import audio_service
 from report_service import report_service
+from auth import (
+    employee_cache, revocation_list, create_access_token,
+    get_current_employee, require_self_or_elevated, require_file_access,
+    create_stream_ticket, redeem_stream_ticket
+)
+from events import event_hub, employee_topic, asset_topic
+from fast_response import fast_list_response, rows_to_dicts, encode_json, FastJSONResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.post("/api/auth/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
-    """Employee login - Hardcoded for MVP"""
+    """Employee login - Hardcoded credentials for MVP"""
     if request.username.strip() == "john.doe" and request.password.strip() == "password123":
-        print("Executing query for username:", repr(request.username))
-        results = db.execute_query(
-            "SELECT employee_id, username, full_name, role FROM employees WHERE username = ?",
-            (request.username,)
-        )
+        employee = employee_cache.get_by_username(request.username)
         
-        if results:
-            row = results[0]
+        if employee:
             return LoginResponse(
-                employee_id=row[0],
-                username=row[1],
-                full_name=row[2],
-                role=row[3],
-                token="mock_jwt_token_" + str(uuid.uuid4())
+                employee_id=employee["employee_id"],
+                username=employee["username"],
+                full_name=employee["full_name"],
+                role=employee["role"],
+                token=create_access_token(employee["employee_id"], employee["role"])
             )
     
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
+@router.post("/api/auth/logout")
+async def logout(current: AuthenticatedEmployee = Depends(get_current_employee)):
+    """Revoke the caller's token"""
+    revocation_list.revoke(current.token_id, current.expires_at)
+    return {"status": "logged_out"}
+
 @router.get("/api/inspections/scheduled/{employee_id}", response_model=List[ScheduledInspection])
-async def get_scheduled_inspections(employee_id: int):
+async def get_scheduled_inspections(
+    employee_id: int,
+    request: Request,
+    current: AuthenticatedEmployee = Depends(get_current_employee)
+):
     """Get scheduled inspections"""
+    require_self_or_elevated(current, employee_id)
     results = db.execute_query("""
-        SELECT si.schedule_id, si.asset_id, a.asset_name, a.asset_type, 
-               a.location, si.scheduled_date, a.last_inspection_date
+        SELECT si.schedule_id, si.asset_id, COALESCE(a.asset_name, ''), COALESCE(a.asset_type, ''),
+               COALESCE(a.location, ''), si.scheduled_date, a.last_inspection_date
         FROM scheduled_inspections si
         JOIN assets a ON si.asset_id = a.asset_id
         WHERE si.assigned_to = ? AND si.status = 'Pending'
         ORDER BY si.scheduled_date
     """, (employee_id,))
     
-    inspections = []
-    for row in results:
-        inspections.append(ScheduledInspection(
-            schedule_id=row[0],
-            asset_id=row[1],
-            asset_name=row[2],
-            asset_type=row[3],
-            location=row[4],
-            scheduled_date=row[5],
-            last_inspection_date=row[6]
-        ))
-    
-    return inspections
+    # Columns in SELECT order; encoded directly without per-row models, so string
+    # columns are coalesced in SQL to keep the response within the OpenAPI schema
+    return fast_list_response(
+        results,
+        ("schedule_id", "asset_id", "asset_name", "asset_type",
+         "location", "scheduled_date", "last_inspection_date"),
+        request.headers.get("accept-encoding", "")
+    )
 
 @router.get("/api/assets/{asset_id}", response_model=AssetDetail)
-async def get_asset_detail(asset_id: int):
+async def get_asset_detail(asset_id: int, current: AuthenticatedEmployee = Depends(get_current_employee)):
     """Get asset details"""
     results = db.execute_query("""
         SELECT asset_id, asset_name, asset_type, location, 
@@ -88,30 +108,48 @@ async def get_asset_detail(asset_id: int):
     )
 
 @router.get("/api/assets/{asset_id}/history", response_model=List[AuditHistory])
-async def get_asset_history(asset_id: int):
+async def get_asset_history(
+    asset_id: int,
+    request: Request,
+    current: AuthenticatedEmployee = Depends(get_current_employee)
+):
     """Get audit history"""
     results = db.execute_query("""
-        SELECT audit_id, inspection_date, audit_status, 
-               urgency_level, ai_summary
+        SELECT audit_id, inspection_date, COALESCE(audit_status, ''),
+               COALESCE(urgency_level, ''), ai_summary
         FROM audits
         WHERE asset_id = ? AND workflow_status = 'Closed'
         ORDER BY inspection_date DESC
     """, (asset_id,))
     
-    history = []
-    for row in results:
-        history.append(AuditHistory(
-            audit_id=row[0],
-            inspection_date=row[1],
-            audit_status=row[2],
-            urgency_level=row[3],
-            summary=row[4] or "No summary"
-        ))
+    photos = db.execute_query("""
+        SELECT ap.audit_id, ap.photo_url
+        FROM audit_photos ap
+        JOIN audits au ON ap.audit_id = au.audit_id
+        WHERE au.asset_id = ? AND au.workflow_status = 'Closed'
+    """, (asset_id,))
     
-    return history
+    # Attach rendition URLs so history screens load previews, not originals
+    photos_by_audit = {}
+    for audit_id, photo_url in photos:
+        photos_by_audit.setdefault(audit_id, []).append(storage_service.rendition_urls(photo_url))
+    
+    history = rows_to_dicts(
+        results,
+        ("audit_id", "inspection_date", "audit_status", "urgency_level", "summary"),
+        defaults={"summary": "No summary"}
+    )
+    for record in history:
+        record["photos"] = photos_by_audit.get(record["audit_id"], [])
+    
+    return FastJSONResponse(encode_json(history), request.headers.get("accept-encoding", ""))
 
 @router.post("/api/upload/photo", response_model=PhotoUploadResponse)
-async def upload_photo(file: UploadFile = File(...)):
+async def upload_photo(
+    file: UploadFile = File(...),
+    audit_status: str = Form("Good"),
+    current: AuthenticatedEmployee = Depends(get_current_employee)
+):
     """Upload photo with REAL Azure OpenAI Vision analysis"""
     try:
         file_extension = file.filename.split('.')[-1]
@@ -120,39 +158,233 @@ async def upload_photo(file: UploadFile = File(...)):
         # Upload to Azure Blob Storage
         photo_url = storage_service.upload_photo(content, file_extension, file.content_type)
         
-        # REAL AI analysis using Azure OpenAI Vision
-        ai_notes = ai_service.analyze_photo(content, "Good")
+        # REAL AI analysis using Azure OpenAI Vision; notes are reused on submit
+        ai_notes = ai_service.analyze_photo(content, audit_status)
+        ai_service.photo_notes.put(storage_service.parse_url(photo_url)[1], ai_notes)
         
-        return PhotoUploadResponse(url=photo_url, ai_notes=ai_notes)
+        return PhotoUploadResponse(ai_notes=ai_notes, **storage_service.rendition_urls(photo_url))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@router.post("/api/upload/photos", response_model=BatchPhotoUploadResponse)
+async def upload_photos(
+    files: List[UploadFile] = File(...),
+    audit_status: str = Form("Good"),
+    current: AuthenticatedEmployee = Depends(get_current_employee)
+):
+    """Upload several photos in one request; storage and batched analysis run concurrently"""
+    if len(files) > settings.UPLOAD_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.UPLOAD_MAX_FILES} files per request")
+    
+    contents = [await file.read() for file in files]
+    
+    # All photos go to the vision model together while the uploads proceed
+    upload_results, analysis = await asyncio.gather(
+        storage_service.upload_photos([
+            (content, file.filename.split('.')[-1], file.content_type)
+            for file, content in zip(files, contents)
+        ]),
+        run_in_threadpool(ai_service.analyze_photos, contents, audit_status)
+    )
+    
+    uploaded, failed = [], []
+    for index, (file, result, notes) in enumerate(zip(files, upload_results, analysis["photo_notes"])):
+        if isinstance(result, Exception):
+            failed.append(PhotoUploadResult(
+                index=index,
+                filename=file.filename,
+                error=f"Upload failed: {str(result)}"
+            ))
+        else:
+            ai_service.photo_notes.put(storage_service.parse_url(result)[1], notes)
+            uploaded.append(PhotoUploadResult(
+                index=index,
+                filename=file.filename,
+                ai_notes=notes,
+                **storage_service.rendition_urls(result)
+            ))
+    
+    return BatchPhotoUploadResponse(
+        uploaded=uploaded,
+        failed=failed,
+        combined_assessment=analysis["combined_assessment"]
+    )
+
 @router.post("/api/upload/voice", response_model=VoiceUploadResponse)
-async def upload_voice(file: UploadFile = File(...)):
+async def upload_voice(
+    file: UploadFile = File(...),
+    current: AuthenticatedEmployee = Depends(get_current_employee)
+):
     """Upload voice with REAL Azure Speech-to-Text"""
     try:
         content = await file.read()
         
-        # Upload to Azure Blob Storage
-        voice_url = storage_service.upload_voice(content)
+        # Normalize for recognition and compress for storage, off the event loop
+        processed = await run_in_threadpool(audio_service.process_voice, content)
+        logger.info(
+            "Voice note %s: %.1fs audio, %d -> %d bytes (%.1fx), transcode %.2fs per audio minute",
+            processed["source_format"], processed["duration_seconds"] or 0,
+            len(content), len(processed["archive_audio"]), processed["compression_ratio"],
+            audio_service.transcode_seconds_per_minute(processed)
+        )
+        
+        # Upload compressed rendition to storage
+        voice_url = storage_service.upload_voice(
+            processed["archive_audio"],
+            processed["archive_extension"],
+            processed["archive_content_type"]
+        )
         
         # REAL transcription using Azure Speech Service
-        transcription = speech_service.transcribe_audio(content)
+        transcription = speech_service.transcribe_audio(processed["recognition_audio"])
         
-        return VoiceUploadResponse(url=voice_url, transcription=transcription)
+        return VoiceUploadResponse(url=storage_service.signed_url(voice_url), transcription=transcription)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Voice upload failed: {str(e)}")
 
+def _stat_stored_file(container: str, name: str) -> tuple:
+    """Validate a files-route path and return (size, content_type)"""
+    if container not in storage_service.containers or "/" in name or "\\" in name or name.startswith("."):
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    stat = storage_service.stat(container, name)
+    if not stat:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    size, content_type = stat
+    return size, content_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+def _parse_range(range_header: str, size: int) -> Optional[tuple]:
+    """
+    Parse a single-range "bytes=" header into inclusive (start, end)
+    Returns None for headers that cannot be parsed, which RFC 9110 says to ignore,
+    and raises 416 for valid ranges the file cannot satisfy
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    
+    start, dash, end = spec.split(",")[0].strip().partition("-")
+    try:
+        first = int(start) if start else None
+        last = int(end) if end else None
+    except ValueError:
+        return None
+    if not dash or (first is None and last is None) or (first is not None and last is not None and last < first):
+        return None
+    
+    if first is None:
+        # Suffix range: last N bytes
+        satisfiable = size > 0 and last > 0
+        byte_range = (max(size - last, 0), size - 1)
+    else:
+        satisfiable = first < size
+        byte_range = (first, size - 1 if last is None else min(last, size - 1))
+    
+    if not satisfiable:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return byte_range
+
+@router.get("/api/files/{container}/{name}", dependencies=[Depends(require_file_access)])
+def get_stored_file(container: str, name: str, request: Request):
+    """Serve a stored file, honouring HTTP Range requests for audio seeking"""
+    size, content_type = _stat_stored_file(container, name)
+    headers = {"Accept-Ranges": "bytes"}
+    
+    range_header = request.headers.get("range")
+    byte_range = _parse_range(range_header, size) if range_header else None
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        content = storage_service.read(container, name, start, end - start + 1)
+        return Response(content=content, status_code=206, media_type=content_type, headers=headers)
+    
+    # Starlette's FileResponse streams local files in chunks; it does not use sendfile
+    local_path = storage_service.local_path(container, name)
+    if local_path:
+        return FileResponse(local_path, media_type=content_type, headers=headers)
+    return Response(content=storage_service.read(container, name), media_type=content_type, headers=headers)
+
+@router.get("/api/files/{container}/{name}/renditions/{rendition}", dependencies=[Depends(require_file_access)])
+def get_photo_rendition(container: str, name: str, rendition: str):
+    """Serve a cached thumbnail/preview rendition of a stored photo"""
+    if rendition not in RENDITIONS or container != storage_service.photo_container:
+        raise HTTPException(status_code=404, detail="Rendition not found")
+    _stat_stored_file(container, name)
+    
+    try:
+        content = storage_service.get_rendition(container, name, rendition)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rendition failed: {str(e)}")
+    
+    return Response(
+        content=content,
+        media_type="image/jpeg",
+        headers={"Cache-Control": "private, max-age=31536000, immutable"}
+    )
+
+def _assess_audit_photos(photo_urls: List[str], audit_status: str, usage: list) -> Optional[str]:
+    """
+    Combined assessment of an audit's photos with its final status, from the notes
+    recorded at upload. Only photos without notes (e.g. uploaded to another worker)
+    are read back and sent to the vision model. None when there are no photos.
+    """
+    names = [
+        name for container, name in map(storage_service.parse_url, photo_urls)
+        if container == storage_service.photo_container
+    ]
+    notes = {name: ai_service.photo_notes.get(name) for name in names}
+    
+    missing, images = [], []
+    for name in [name for name in names if notes[name] is None]:
+        try:
+            images.append(storage_service.read(storage_service.photo_container, name))
+            missing.append(name)
+        except Exception as e:
+            logger.warning("Skipping photo %s in audit assessment: %s", name, e)
+    if images:
+        analysis = ai_service.analyze_photos(images, audit_status, usage)
+        notes.update(zip(missing, analysis["photo_notes"]))
+        if len(missing) == len(names):
+            return analysis["combined_assessment"]
+    
+    ordered = [notes[name] for name in names if notes[name] is not None]
+    if not ordered:
+        return None
+    return ai_service.combine_photo_notes(ordered, audit_status, usage)
+
 @router.post("/api/audits/submit", response_model=AuditSubmissionResponse)
-async def submit_audit(audit: AuditSubmission):
+async def submit_audit(
+    audit: AuditSubmission,
+    current: AuthenticatedEmployee = Depends(get_current_employee)
+):
     """Submit audit with REAL AI analysis"""
+    require_self_or_elevated(current, audit.inspector_id)
+    
+    # Store file URLs without their short-lived signatures
+    audit.photo_urls = [storage_service.canonical_url(url) for url in audit.photo_urls]
+    if audit.voice_file_url:
+        audit.voice_file_url = storage_service.canonical_url(audit.voice_file_url)
+    
     try:
-        # REAL AI Analysis using Azure OpenAI
-        ai_result = ai_service.analyze_audit(
-            audit.raw_comments,
-            audit.audit_status,
-            len(audit.photo_urls)
+        # REAL AI Analysis using Azure OpenAI; the photo notes from upload are
+        # combined, with the final status, alongside the text agents
+        photo_usage = []
+        ai_result, photo_assessment = await asyncio.gather(
+            run_in_threadpool(
+                ai_service.analyze_audit,
+                audit.raw_comments,
+                audit.audit_status,
+                len(audit.photo_urls)
+            ),
+            run_in_threadpool(_assess_audit_photos, audit.photo_urls, audit.audit_status, photo_usage)
         )
+        if photo_assessment:
+            ai_result["structured_output"]["photo_assessment"] = photo_assessment
         
         # Insert audit record
         audit_id = db.execute_insert_with_identity("""
@@ -172,6 +404,14 @@ async def submit_audit(audit: AuditSubmission):
             ai_result["urgency_level"]
         ))
         
+        # Per-audit token and latency metrics for cost tracking
+        usage = ai_service.summarize_usage(ai_result["usage"]["calls"] + photo_usage)
+        logger.info(
+            "Audit %s AI usage: prompt=%s completion=%s cached=%s latency_ms=%s calls=%s",
+            audit_id, usage["prompt_tokens"], usage["completion_tokens"],
+            usage["cached_tokens"], usage["latency_ms"], len(usage["calls"])
+        )
+        
         # Insert photo records
         for photo_url in audit.photo_urls:
             db.execute_update(
@@ -185,6 +425,21 @@ async def submit_audit(audit: AuditSubmission):
             (audit.asset_id,)
         )
         
+        # Push deltas to clients watching this asset or inspector
+        now = datetime.now()
+        event_hub.publish(asset_topic(audit.asset_id), "audit_submitted", {
+            "audit_id": audit_id,
+            "inspection_date": now,
+            "audit_status": audit.audit_status,
+            "urgency_level": ai_result["urgency_level"],
+            "summary": ai_result["summary"] or "No summary",
+            "photos": [storage_service.rendition_urls(url) for url in audit.photo_urls]
+        })
+        event_hub.publish(employee_topic(audit.inspector_id), "schedule_updated", {
+            "asset_id": audit.asset_id,
+            "last_inspection_date": now
+        })
+        
         return AuditSubmissionResponse(
             audit_id=audit_id,
             status="success",
@@ -199,7 +454,10 @@ async def submit_audit(audit: AuditSubmission):
         raise HTTPException(status_code=500, detail=f"Audit submission failed: {str(e)}")
 
 @router.post("/api/reports/generate", response_model=ReportResponse)
-async def generate_report(filters: ReportFilter):
+async def generate_report(
+    filters: ReportFilter,
+    current: AuthenticatedEmployee = Depends(get_current_employee)
+):
     """Generate PDF report"""
     try:
         query = """
@@ -225,13 +483,89 @@ async def generate_report(filters: ReportFilter):
         
         audits = db.execute_query(query, tuple(params))
         
-        # Generate PDF report
-        report_url = report_service.generate_pdf_report(audits, filters)
+        # Generate PDF report off the event loop; large reports render in the process pool
+        report_url = await run_in_threadpool(report_service.generate_pdf_report, audits, filters)
         
         return ReportResponse(
-            report_url=report_url,
+            report_url=storage_service.signed_url(report_url),
             total_audits=len(audits)
         )
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
+
+def _live_topics(current: AuthenticatedEmployee, employee_id: Optional[int], asset_id: Optional[int]) -> set:
+    """Topics a live-update client subscribes to; defaults to the caller's own schedule"""
+    if employee_id is None and asset_id is None:
+        employee_id = current.employee_id
+    
+    topics = set()
+    if employee_id is not None:
+        require_self_or_elevated(current, employee_id)
+        topics.add(employee_topic(employee_id))
+    if asset_id is not None:
+        topics.add(asset_topic(asset_id))
+    return topics
+
+@router.post("/api/live/ticket", response_model=LiveTicketResponse)
+async def issue_live_ticket(
+    employee_id: Optional[int] = None,
+    asset_id: Optional[int] = None,
+    current: AuthenticatedEmployee = Depends(get_current_employee)
+):
+    """
+    Single-use ticket for opening a live-update stream
+    EventSource and browser WebSockets cannot set headers, so the ticket goes in the
+    stream URL in place of the session token
+    """
+    topics = _live_topics(current, employee_id, asset_id)
+    return LiveTicketResponse(
+        ticket=create_stream_ticket(current, topics),
+        expires_in=settings.LIVE_TICKET_TTL_SECONDS
+    )
+
+@router.get("/api/live/events")
+async def live_events(request: Request, ticket: str):
+    """Server-sent events stream of schedule and audit updates, opened with a ticket from /api/live/ticket"""
+    topics = await redeem_stream_ticket(ticket)
+    
+    async def stream():
+        async with event_hub.subscribe(topics) as subscription:
+            yield b"retry: 5000\n\n"
+            while not await request.is_disconnected():
+                message = await subscription.get(settings.EVENT_HEARTBEAT_SECONDS)
+                yield (b"data: " + message + b"\n\n") if message else b": heartbeat\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/api/live/ws")
+async def live_websocket(websocket: WebSocket, ticket: str):
+    """WebSocket stream of schedule and audit updates, opened with a ticket from /api/live/ticket"""
+    try:
+        topics = await redeem_stream_ticket(ticket)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    async with event_hub.subscribe(topics) as subscription:
+        async def forward():
+            while True:
+                message = await subscription.get(settings.EVENT_HEARTBEAT_SECONDS)
+                # Heartbeats keep idle connections open through proxies
+                await websocket.send_text(message.decode("utf-8") if message else '{"type":"heartbeat"}')
+        
+        sender = asyncio.create_task(forward())
+        try:
+            # Client frames are ignored; receiving detects disconnects promptly
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+            # The sender may also have failed on the closed socket
+            with contextlib.suppress(asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+                await sender
@@ -1,56 +1,283 @@
 """
-Azure Blob Storage service
+Storage service with pluggable backends (Azure Blob Storage or local filesystem)
 """
 from azure.storage.blob import BlobServiceClient, ContentSettings
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+from azure.core.exceptions import ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
+from typing import Optional
+from urllib.parse import urlparse, unquote
+import aiohttp
+import asyncio
+import hashlib
+import hmac
+import mimetypes
+import mmap
+import io
+import os
+import time
 import uuid
 from config import settings
 
-class StorageService:
-    def __init__(self):
-        self.blob_service_client = BlobServiceClient.from_connection_string(
-            settings.STORAGE_CONNECTION_STRING
-        )
-    
-    def upload_photo(self, file_content: bytes, file_extension: str, content_type: str) -> str:
-        """Upload photo to Azure Blob Storage"""
-        blob_name = f"{uuid.uuid4()}.{file_extension}"
-        blob_client = self.blob_service_client.get_blob_client(
-            container="inspection-photos",
-            blob=blob_name
-        )
-        
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - renditions need Pillow
+    Image = None
+
+# Rendition name -> longest edge in pixels
+RENDITIONS = {
+    "thumb": 256,
+    "preview": 1024,
+}
+
+
+class AzureBlobBackend:
+    """Azure Blob Storage backend"""
+
+    def __init__(self, connection_string: str):
+        self.connection_string = connection_string
+        self.blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+        self._async_client = None
+        self._session = None
+
+    def _get_async_client(self) -> AsyncBlobServiceClient:
+        """Async client sharing one pooled aiohttp session, created on first use inside the event loop"""
+        if self._async_client is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=settings.UPLOAD_CONNECTION_POOL_SIZE)
+            )
+            self._async_client = AsyncBlobServiceClient.from_connection_string(
+                self.connection_string,
+                transport=AioHttpTransport(session=self._session, session_owner=False)
+            )
+        return self._async_client
+
+    def put(self, container: str, name: str, content: bytes, content_type: Optional[str] = None) -> str:
+        blob_client = self.blob_service_client.get_blob_client(container=container, blob=name)
         blob_client.upload_blob(
-            file_content,
-            content_settings=ContentSettings(content_type=content_type),
+            content,
+            content_settings=ContentSettings(content_type=content_type) if content_type else None,
             overwrite=True
         )
-        
         return blob_client.url
-    
-    def upload_voice(self, file_content: bytes) -> str:
-        """Upload voice recording to Azure Blob Storage"""
-        blob_name = f"{uuid.uuid4()}.wav"
-        blob_client = self.blob_service_client.get_blob_client(
-            container="voice-recordings",
-            blob=blob_name
-        )
-        
-        blob_client.upload_blob(file_content, overwrite=True)
-        return blob_client.url
-    
-    def upload_report(self, pdf_content: bytes, filename: str) -> str:
-        """Upload PDF report to Azure Blob Storage"""
-        blob_client = self.blob_service_client.get_blob_client(
-            container="audit-reports",
-            blob=filename
-        )
-        
-        blob_client.upload_blob(
-            pdf_content,
-            content_settings=ContentSettings(content_type='application/pdf'),
+
+    async def put_async(self, container: str, name: str, content: bytes, content_type: Optional[str] = None) -> str:
+        blob_client = self._get_async_client().get_blob_client(container=container, blob=name)
+        await blob_client.upload_blob(
+            content,
+            content_settings=ContentSettings(content_type=content_type) if content_type else None,
             overwrite=True
         )
-        
         return blob_client.url
 
-storage_service = StorageService()
\ No newline at end of file
+    async def close(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            await self._session.close()
+            self._async_client = None
+            self._session = None
+
+    def stat(self, container: str, name: str) -> Optional[tuple]:
+        """Return (size, content_type), or None if the object does not exist"""
+        blob_client = self.blob_service_client.get_blob_client(container=container, blob=name)
+        try:
+            properties = blob_client.get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        return properties.size, properties.content_settings.content_type
+
+    def read(self, container: str, name: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        blob_client = self.blob_service_client.get_blob_client(container=container, blob=name)
+        return blob_client.download_blob(offset=offset, length=length).readall()
+
+    def local_path(self, container: str, name: str) -> Optional[str]:
+        return None
+
+
+class LocalFileBackend:
+    """Local filesystem backend, served through the /api/files route"""
+
+    def __init__(self, root: str, public_url: str):
+        self.root = os.path.abspath(root)
+        self.public_url = public_url.rstrip("/")
+
+    def local_path(self, container: str, name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, container, name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage path: {container}/{name}")
+        return path
+
+    def put(self, container: str, name: str, content: bytes, content_type: Optional[str] = None) -> str:
+        path = self.local_path(container, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see partial files
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        return f"{self.public_url}/api/files/{container}/{name}"
+
+    async def put_async(self, container: str, name: str, content: bytes, content_type: Optional[str] = None) -> str:
+        return await asyncio.to_thread(self.put, container, name, content, content_type)
+
+    async def close(self):
+        pass
+
+    def stat(self, container: str, name: str) -> Optional[tuple]:
+        path = self.local_path(container, name)
+        if not os.path.isfile(path):
+            return None
+        return os.path.getsize(path), mimetypes.guess_type(name)[0]
+
+    def read(self, container: str, name: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        with open(self.local_path(container, name), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return b""
+            end = size if length is None else min(size, offset + length)
+            # mmap slices copy only the requested range into memory
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[offset:end]
+
+
+class StorageService:
+    def __init__(self):
+        if settings.STORAGE_BACKEND == "local":
+            self.backend = LocalFileBackend(settings.LOCAL_STORAGE_ROOT, settings.PUBLIC_API_URL)
+        else:
+            self.backend = AzureBlobBackend(settings.STORAGE_CONNECTION_STRING)
+
+        self.photo_container = settings.PHOTO_CONTAINER
+        self.voice_container = settings.VOICE_CONTAINER
+        self.report_container = settings.REPORT_CONTAINER
+        self.rendition_container = settings.RENDITION_CONTAINER
+
+    @property
+    def containers(self) -> set:
+        """Containers that may be served through the files route"""
+        return {self.photo_container, self.voice_container, self.report_container}
+
+    def upload_photo(self, file_content: bytes, file_extension: str, content_type: str) -> str:
+        """Upload inspection photo"""
+        blob_name = f"{uuid.uuid4()}.{file_extension}"
+        return self.backend.put(self.photo_container, blob_name, file_content, content_type)
+
+    async def upload_photos(self, files: list) -> list:
+        """
+        Upload several photos concurrently, at most UPLOAD_MAX_CONCURRENCY at a time
+        `files` holds (content, extension, content_type) tuples; returns a URL or
+        the raised exception for each file, in order
+        """
+        semaphore = asyncio.Semaphore(settings.UPLOAD_MAX_CONCURRENCY)
+
+        async def upload(file_content: bytes, file_extension: str, content_type: str) -> str:
+            async with semaphore:
+                blob_name = f"{uuid.uuid4()}.{file_extension}"
+                return await self.backend.put_async(self.photo_container, blob_name, file_content, content_type)
+
+        return await asyncio.gather(*(upload(*file) for file in files), return_exceptions=True)
+
+    def upload_voice(self, file_content: bytes, file_extension: str = "wav", content_type: str = "audio/wav") -> str:
+        """Upload voice recording"""
+        blob_name = f"{uuid.uuid4()}.{file_extension}"
+        return self.backend.put(self.voice_container, blob_name, file_content, content_type)
+
+    def upload_report(self, pdf_content: bytes, filename: str) -> str:
+        """Upload PDF report"""
+        return self.backend.put(self.report_container, filename, pdf_content, 'application/pdf')
+
+    def stat(self, container: str, name: str) -> Optional[tuple]:
+        """Return (size, content_type) for a stored file, or None if missing"""
+        return self.backend.stat(container, name)
+
+    def read(self, container: str, name: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Read a stored file, or a byte range of it"""
+        return self.backend.read(container, name, offset, length)
+
+    def local_path(self, container: str, name: str) -> Optional[str]:
+        """Filesystem path of a stored file when the backend is local, else None"""
+        return self.backend.local_path(container, name)
+
+    def get_rendition(self, container: str, name: str, rendition: str) -> bytes:
+        """
+        Return a cached JPEG rendition of a stored photo, generating it on first use
+        """
+        if Image is None:
+            raise RuntimeError("Pillow is required for photo renditions")
+
+        rendition_name = f"{container}/{rendition}/{os.path.splitext(name)[0]}.jpg"
+        if self.backend.stat(self.rendition_container, rendition_name):
+            return self.backend.read(self.rendition_container, rendition_name)
+
+        size = RENDITIONS[rendition]
+        image = Image.open(io.BytesIO(self.backend.read(container, name)))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=80, optimize=True)
+        content = output.getvalue()
+
+        self.backend.put(self.rendition_container, rendition_name, content, "image/jpeg")
+        return content
+
+    def rendition_urls(self, photo_url: str) -> dict:
+        """Map a stored photo URL to signed original, thumbnail and preview URLs"""
+        container, name = self.parse_url(photo_url)
+        base = f"{self.files_url}/{container}/{name}/renditions"
+        return {
+            "url": self.signed_url(photo_url),
+            "thumbnail_url": self.signed_url(f"{base}/thumb"),
+            "preview_url": self.signed_url(f"{base}/preview"),
+        }
+
+    @property
+    def files_url(self) -> str:
+        """Base URL of the /api/files route"""
+        return f"{settings.PUBLIC_API_URL.rstrip('/')}/api/files"
+
+    def signed_url(self, url: str) -> str:
+        """
+        Add a short-lived signature to a URL served by the /api/files route, so
+        <img> and <audio> tags can load it without an Authorization header.
+        Expiry is rounded up to the next FILE_URL_TTL_SECONDS window so URLs stay
+        stable (and cacheable) within a window. Other URLs are returned unchanged.
+        """
+        prefix = f"{self.files_url}/"
+        if not url.startswith(prefix):
+            return url
+        path = self.canonical_url(url)[len(prefix):]
+        ttl = settings.FILE_URL_TTL_SECONDS
+        expires = (int(time.time()) // ttl + 2) * ttl
+        return f"{prefix}{path}?exp={expires}&sig={self._sign(path, expires)}"
+
+    def canonical_url(self, url: str) -> str:
+        """Strip the signature from a /api/files URL before it is stored"""
+        if url.startswith(f"{self.files_url}/"):
+            return url.split("?", 1)[0]
+        return url
+
+    def verify_signature(self, path: str, expires: str, signature: str) -> bool:
+        """Check a signed /api/files path (relative to the route) and its expiry"""
+        try:
+            expires = int(expires)
+        except (TypeError, ValueError):
+            return False
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._sign(path, expires), signature or "")
+
+    def _sign(self, path: str, expires: int) -> str:
+        message = f"{path}:{expires}".encode("utf-8")
+        return hmac.new(settings.JWT_SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+    async def close(self):
+        """Release pooled connections held by the backend"""
+        await self.backend.close()
+
+    def parse_url(self, url: str) -> tuple:
+        """Extract (container, name) from a URL returned by either backend"""
+        parts = unquote(urlparse(url).path).rstrip("/").split("/")
+        return parts[-2], parts[-1]
+
+storage_service = StorageService()
@@ -0,0 +1,93 @@
+"""
+Token counting and prompt truncation helpers for AIService
+"""
+from config import settings
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - falls back to a character estimate
+    tiktoken = None
+
+# Approximate characters per token when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+# Fixed per-message overhead of the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = " [...] "
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """Tokenizer for the deployment, or None to use the character estimate"""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    _encoding_loaded = True
+    if tiktoken is None:
+        return None
+
+    try:
+        _encoding = tiktoken.encoding_for_model(settings.AZURE_OPENAI_DEPLOYMENT)
+        return _encoding
+    except Exception:
+        pass
+    # Newer models are not mapped by older tiktoken releases; try the closest encodings.
+    # Loading can also fail offline, since encodings are downloaded on first use.
+    for name in ("o200k_base", "cl100k_base"):
+        try:
+            _encoding = tiktoken.get_encoding(name)
+            return _encoding
+        except Exception:
+            continue
+    return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: list) -> int:
+    """Estimate prompt tokens for a chat message list (text parts only)"""
+    total = 0
+    for message in messages:
+        total += MESSAGE_OVERHEAD_TOKENS
+        content = message["content"]
+        if isinstance(content, str):
+            total += count_tokens(content)
+        else:
+            total += sum(count_tokens(part["text"]) for part in content if part.get("type") == "text")
+    return total
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """
+    Fit text into a token budget, keeping the start and end of the text
+    Inspector notes usually open with the context and close with the conclusion
+    """
+    if count_tokens(text) <= budget:
+        return text
+
+    keep = max(budget - count_tokens(TRUNCATION_MARKER), 0)
+    head_size = keep * 2 // 3
+    tail_size = keep - head_size
+
+    encoding = _get_encoding()
+    if encoding is None:
+        head = text[:head_size * CHARS_PER_TOKEN]
+        tail = text[len(text) - tail_size * CHARS_PER_TOKEN:] if tail_size else ""
+    else:
+        tokens = encoding.encode(text)
+        head = encoding.decode(tokens[:head_size])
+        tail = encoding.decode(tokens[len(tokens) - tail_size:]) if tail_size else ""
+
+    # Cut back to word boundaries so the model does not see split words
+    head = head.rsplit(" ", 1)[0] if " " in head else head
+    tail = tail.split(" ", 1)[-1] if " " in tail else tail
+    return f"{head.strip()}{TRUNCATION_MARKER}{tail.strip()}".strip()
@@ -37,6 +37,36 @@ const App: React.FC = () => {
     }
   }, [currentView, selectedAsset]);
 
+  // Apply pushed deltas instead of re-fetching
+  useEffect(() => {
+    if (!user || (currentView !== 'dashboard' && currentView !== 'asset-detail')) return;
+
+    const unsubscribe = apiService.subscribeLiveUpdates(
+      currentView === 'dashboard'
+        ? { employee_id: user.employee_id }
+        : { asset_id: selectedAsset?.asset_id },
+      (event) => {
+        if (event.type === 'schedule_updated') {
+          setScheduledInspections((items) =>
+            items.map((item) =>
+              item.asset_id === event.data.asset_id
+                ? { ...item, last_inspection_date: event.data.last_inspection_date }
+                : item
+            )
+          );
+        } else if (event.type === 'audit_submitted') {
+          setAssetHistory((items) =>
+            items.some((item) => item.audit_id === event.data.audit_id)
+              ? items
+              : [event.data, ...items]
+          );
+        }
+      }
+    );
+
+    return unsubscribe;
+  }, [currentView, user, selectedAsset]);
+
   const loadScheduledInspections = async () => {
     if (!user) return;
     setLoading(true);
@@ -110,6 +140,9 @@ const App: React.FC = () => {
         `- Status: ${inspection.auditStatus}\n` +
         `- Urgency: ${result.ai_analysis.urgency_level}\n` +
         `- Summary: ${result.ai_analysis.summary}\n` +
+        (result.ai_analysis.structured_output?.photo_assessment
+          ? `- Photos: ${result.ai_analysis.structured_output.photo_assessment}\n`
+          : '') +
         `- Workflow Status: Closed`
       );
       
@@ -122,6 +155,7 @@ const App: React.FC = () => {
   };
 
   const handleLogout = () => {
+    apiService.logout();
     setUser(null);
     setSelectedAsset(null);
     setScheduledInspections([]);
@@ -174,6 +208,7 @@ const App: React.FC = () => {
           comments={inspection.comments}
           setComments={inspection.setComments}
           photos={inspection.photos}
+          photoAssessment={inspection.photoAssessment}
           isRecording={inspection.isRecording}
           isSubmitting={inspection.isSubmitting}
           loading={inspection.loading}
@@ -98,6 +98,20 @@ export const AssetDetailView: React.FC<AssetDetailViewProps> = ({
                         {new Date(audit.inspection_date).toLocaleDateString()}
                       </p>
                       <p className="text-gray-600 text-sm">{audit.summary}</p>
+                      {audit.photos && audit.photos.length > 0 && (
+                        <div className="flex flex-wrap gap-2 mt-2">
+                          {audit.photos.map((photo) => (
+                            <a key={photo.url} href={photo.preview_url} target="_blank" rel="noreferrer">
+                              <img
+                                src={photo.thumbnail_url}
+                                alt="Inspection"
+                                loading="lazy"
+                                className="w-16 h-16 object-cover rounded"
+                              />
+                            </a>
+                          ))}
+                        </div>
+                      )}
                     </div>
                     <div className="flex gap-2">
                       <span
@@ -12,6 +12,7 @@ interface InspectionViewProps {
   comments: string;
   setComments: (comments: string) => void;
   photos: AuditPhoto[];
+  photoAssessment: string | null;
   isRecording: boolean;
   isSubmitting: boolean;
   loading: boolean;
@@ -29,6 +30,7 @@ export const InspectionView: React.FC<InspectionViewProps> = ({
   comments,
   setComments,
   photos,
+  photoAssessment,
   isRecording,
   isSubmitting,
   loading,
@@ -152,6 +154,13 @@ export const InspectionView: React.FC<InspectionViewProps> = ({
                 ))}
               </div>
             )}
+
+            {photoAssessment && (
+              <div className="mt-4 p-3 bg-blue-50 rounded text-sm text-gray-700">
+                <p className="font-semibold">AI Assessment (preliminary, per upload):</p>
+                <p className="whitespace-pre-line">{photoAssessment}</p>
+              </div>
+            )}
           </div>
 
           {/* Comments */}
@@ -9,6 +9,7 @@ export const useInspection = () => {
   const [auditStatus, setAuditStatus] = useState<AuditStatus>('Good');
   const [comments, setComments] = useState('');
   const [photos, setPhotos] = useState<AuditPhoto[]>([]);
+  const [photoAssessment, setPhotoAssessment] = useState<string | null>(null);
   const [voiceFileUrl, setVoiceFileUrl] = useState<string | null>(null);
   const [isRecording, setIsRecording] = useState(false);
   const [isSubmitting, setIsSubmitting] = useState(false);
@@ -20,18 +21,32 @@ export const useInspection = () => {
     setError(null);
     
     try {
-      const uploadPromises = Array.from(files).map(async (file) => {
-        const result = await apiService.uploadPhoto(file);
+      const fileList = Array.from(files);
+      const result = await apiService.uploadPhotos(fileList, auditStatus);
+      
+      // Results carry the index of the file in the request
+      const uploadedPhotos = result.uploaded.map((uploaded: any) => {
+        const file = fileList[uploaded.index];
         return {
           file,
           preview: URL.createObjectURL(file),
-          url: result.url,
-          ai_notes: result.ai_notes
+          url: uploaded.url,
+          ai_notes: uploaded.ai_notes
         };
       });
       
-      const uploadedPhotos = await Promise.all(uploadPromises);
       setPhotos([...photos, ...uploadedPhotos]);
+      // Each batch is assessed on its own; keep earlier batches' assessments.
+      // The audit-wide assessment is produced on submit with the final status.
+      if (result.combined_assessment) {
+        setPhotoAssessment(prev => (prev ? `${prev}\n\n` : '') + result.combined_assessment);
+      }
+      if (result.failed.length > 0) {
+        setError(
+          'Failed to upload photos: ' +
+          result.failed.map((f: any) => `${f.filename} (${f.error})`).join(', ')
+        );
+      }
     } catch (err: any) {
       setError('Failed to upload photos: ' + err.message);
     } finally {
@@ -80,6 +95,7 @@ export const useInspection = () => {
     setAuditStatus('Good');
     setComments('');
     setPhotos([]);
+    setPhotoAssessment(null);
     setVoiceFileUrl(null);
     setIsRecording(false);
     setError(null);
@@ -91,6 +107,7 @@ export const useInspection = () => {
     comments,
     setComments,
     photos,
+    photoAssessment,
     voiceFileUrl,
     isRecording,
     isSubmitting,
@@ -42,6 +42,13 @@ class ApiService {
     return response.data;
   }
 
+  async logout() {
+    if (this.token) {
+      await this.client.post('/api/auth/logout').catch(() => undefined);
+    }
+    this.token = null;
+  }
+
   // Scheduled Inspections
   async getScheduledInspections(employeeId: number) {
     const response = await this.client.get(
@@ -62,9 +69,10 @@ class ApiService {
   }
 
   // File Uploads
-  async uploadPhoto(file: File) {
+  async uploadPhoto(file: File, auditStatus: string = 'Good') {
     const formData = new FormData();
     formData.append('file', file);
+    formData.append('audit_status', auditStatus);
 
     const response = await this.client.post('/api/upload/photo', formData, {
       headers: {
@@ -74,6 +82,19 @@ class ApiService {
     return response.data;
   }
 
+  async uploadPhotos(files: File[], auditStatus: string = 'Good') {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    formData.append('audit_status', auditStatus);
+
+    const response = await this.client.post('/api/upload/photos', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+    });
+    return response.data;
+  }
+
   async uploadVoice(blob: Blob) {
     const formData = new FormData();
     formData.append('file', blob, 'recording.wav');
@@ -110,6 +131,43 @@ class ApiService {
     return response.data;
   }
 
+  // Live Updates (server-sent events; EventSource cannot send headers, so the token goes in the query)
+  subscribeLiveUpdates(
+    params: { employee_id?: number; asset_id?: number },
+    onEvent: (event: { type: string; topic: string; data: any }) => void
+  ): () => void {
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+
+    // Stream tickets are single-use, so reconnects fetch a new one instead of
+    // relying on EventSource's built-in retry
+    const reconnect = () => {
+      source?.close();
+      if (!closed) retry = setTimeout(connect, 5000);
+    };
+    const connect = async () => {
+      if (!this.token) return;
+      try {
+        const response = await this.client.post('/api/live/ticket', null, { params });
+        if (closed) return;
+        const query = new URLSearchParams({ ticket: response.data.ticket });
+        source = new EventSource(`${API_BASE_URL}/api/live/events?${query.toString()}`);
+        source.onmessage = (message) => onEvent(JSON.parse(message.data));
+        source.onerror = reconnect;
+      } catch {
+        reconnect();
+      }
+    };
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      source?.close();
+    };
+  }
+
   // Health Check
   async healthCheck() {
     const response = await this.client.get('/health');
@@ -36,12 +36,19 @@ export interface AuditPhoto {
   ai_notes?: string;
 }
 
+export interface PhotoRendition {
+  url: string;
+  thumbnail_url: string;
+  preview_url: string;
+}
+
 export interface AuditHistory {
   audit_id: number;
   inspection_date: string;
   audit_status: string;
   urgency_level: string;
   summary: string;
+  photos?: PhotoRendition[];
 }
 
 export type AuditStatus = 'Good' | 'Fair' | 'Poor' | 'Critical';